@@ -6,12 +6,14 @@ from pypulseq.utils.safe_pns_prediction import safe_example_hw
 from warnings import warn
 from pypulseq.convert import convert
 
-from make_ro_gradient import make_basic_gx_gradient_separat
+from make_ro_gradient import add_trapezoids, make_basic_gx_gradient_separat
 from make_half_sinc_pulse import make_half_sinc_pulse
+from rotate_gradients import rotate_gradient_batch
 
 
 def main(plot_seq=True, plot_k_space_traj=True, plot_2D_k_space=True, plot_grad=False, write_seq=False,
-         seq_filename: str = 'double_half_pulse', save=False, slice_profile=False):
+         seq_filename: str = 'double_half_pulse', save=False, slice_profile=False, traj_txt=False,
+         check_pns=True):
     # ======
     # SETUP
     # ======
@@ -51,13 +53,14 @@ def main(plot_seq=True, plot_k_space_traj=True, plot_2D_k_space=True, plot_grad=
     # Readout with spoiler (and prephaser for slice profile sequences)
     if not slice_profile:
         gx_base, spoil_base = make_basic_gx_gradient_separat(system=system, delay=60e-6)
-        ro = pp.add_gradients([gx_base, spoil_base])
+        ro = add_trapezoids([gx_base, spoil_base], system=system)
         adc = pp.make_adc(num_samples=num_samples, duration=gx_base.flat_time, delay=0, system=system)
     else:
         gx_base, spoil_base, prephase_base = make_basic_gx_gradient_separat(system=system, delay=0, slice_profile=True)
-        ro = pp.add_gradients([prephase_base, gx_base, spoil_base])
+        ro = add_trapezoids([prephase_base, gx_base, spoil_base], system=system)
+        # gx_base is delayed by the prephaser duration, so the adc starts after its delay and ramp up.
         adc = pp.make_adc(num_samples=num_samples, duration=gx_base.flat_time,
-                          delay=pp.calc_duration(prephase_base)+gx_base.rise_time, system=system)
+                          delay=gx_base.delay+gx_base.rise_time, system=system)
 
     # RF Pulse and all parts for slice select gradient
     rf_left, slice_select, mid_phase, rephase = make_half_sinc_pulse(flip_angle=flip_angle * np.pi / 180,
@@ -86,24 +89,34 @@ def main(plot_seq=True, plot_k_space_traj=True, plot_2D_k_space=True, plot_grad=
     # ======
     # CONSTRUCT SEQUENCE
     # ======
+    # The length of one complete block should be TR. The rotation does not change the duration of the readout.
+    tr = (pp.calc_duration(slice_select, rf_right) + pp.calc_duration(mid_phase)
+          + pp.calc_duration(slice_select, rf_left) + pp.calc_duration(rephase) + pp.calc_duration(ro, adc))
+    print(f"TR: {tr*1e3:.2f}ms")
+
+    # The events of the slice select and the adc are the same for all spokes, so they are registered only once.
+    # add_block then uses the stored ids instead of comparing the events with the sequence libraries again.
+    # (The order of registration matches the order of the first spoke, so the ids are unchanged.)
+    slice_select.id = seq.register_grad_event(slice_select)
+    rf_right.id, rf_right.shape_IDs = seq.register_rf_event(rf_right)
+    mid_phase.id = seq.register_grad_event(mid_phase)
+    rf_left.id, rf_left.shape_IDs = seq.register_rf_event(rf_left)
+    rephase.id = seq.register_grad_event(rephase)
+    adc.id = seq.register_adc_event(adc)
+
+    # Readout gradient gets rotated by the double golden angle for each spoke (i).
+    # The rotated waveforms of all spokes are computed at once before the sequence is constructed.
+    spoke_angles = np.arange(num_spokes) * double_golden_angle
+    rotated_ro = rotate_gradient_batch(ro, angles=spoke_angles, axis='z')
     for i in range(0, num_spokes):
         # Add complete slice select with rf pulses at corresponding times.
         seq.add_block(slice_select, rf_right)
         seq.add_block(mid_phase)
         seq.add_block(slice_select, rf_left)
         seq.add_block(rephase)
-        # Readout gradient gets rotated by the double golden angle for each spoke (i).
-        # If Gradient is purely on x or y axis, the function returns only one parameter, otherwise two.
-        # This behaviour is caught here.
-        if len(pp.rotate(ro, angle=i*double_golden_angle, axis='z')) == 1:
-            g = pp.rotate(ro, angle=i*double_golden_angle, axis='z')[0]
-            seq.add_block(g, adc)
-        else:
-            gx, gy = pp.rotate(ro, angle=i*double_golden_angle, axis='z')
-            seq.add_block(gx, gy, adc)
-        if i == 0:
-            # The length of one complete block should be TR.
-            print(f"TR: {seq.duration()[0]*1e3:.2f}ms")
+        # If Gradient is purely on x or y axis, only one gradient is returned, otherwise two.
+        # Unpacking handles both the one- and two-gradient case.
+        seq.add_block(*rotated_ro[i], adc)
 
     print(f"Duration of entire sequence: {seq.duration()[0]*1e3:.2f}ms")
 
@@ -116,11 +129,12 @@ def main(plot_seq=True, plot_k_space_traj=True, plot_2D_k_space=True, plot_grad=
         [print(e) for e in error_report]
 
     ## PNS calc (Peripheral Nerve Stimulation)
-    pns_ok, pns_norm, pns_components, time_axis_pns = seq.calculate_pns(safe_example_hw(), do_plots=plot_seq)  # Safe example HW
-    if pns_ok:
-        print(f'PNS check passed successfully with max {max(pns_norm)*100:.2f}%')
-    else:
-        warn(f'PNS check failed with max {max(pns_norm)*100:.2f}%')
+    if check_pns:
+        pns_ok, pns_norm, pns_components, time_axis_pns = seq.calculate_pns(safe_example_hw(), do_plots=plot_seq)  # Safe example HW
+        if pns_ok:
+            print(f'PNS check passed successfully with max {max(pns_norm)*100:.2f}%')
+        else:
+            warn(f'PNS check failed with max {max(pns_norm)*100:.2f}%')
 
     # ======
     # VISUALIZATION
@@ -134,26 +148,24 @@ def main(plot_seq=True, plot_k_space_traj=True, plot_2D_k_space=True, plot_grad=
     if plot_seq:
         seq.plot(time_disp='ms' ,plot_now=False, show_blocks=False, save=save)
 
-    # Trajectory calculation
-    ktraj_adc, ktraj, t_excitation, t_refocusing, t_adc = seq.calculate_kspace()
-    time_axis = np.arange(1, ktraj.shape[1] + 1) * system.grad_raster_time
-    last_kx_t = time_axis[-1]
-    last_adc_t = t_adc[-1]
-     # fac = last_kx_t / (last_adc_t + spoil_base.flat_time + spoil_base.fall_time)
-    fac = 0.4
-    time_axis = time_axis / fac
+    # Trajectory calculation (only needed for the k-space plots and the trajectory file)
+    if plot_k_space_traj or plot_2D_k_space or (write_seq and not slice_profile):
+        ktraj_adc, ktraj, t_excitation, t_refocusing, t_adc = seq.calculate_kspace()
+        time_axis = np.arange(1, ktraj.shape[1] + 1) * system.grad_raster_time
+        last_kx_t = time_axis[-1]
+        last_adc_t = t_adc[-1]
+         # fac = last_kx_t / (last_adc_t + spoil_base.flat_time + spoil_base.fall_time)
+        fac = 0.4
+        time_axis = time_axis / fac
 
     if plot_k_space_traj:
         plt.figure()
         plt.title("k-space components as functions of time")
         plt.xlabel("time [s]")
         plt.ylabel("kx, ky, kz")
-        plt.plot(time_axis, ktraj[0].T, label='x')
-        plt.plot(time_axis, ktraj[1].T, label='y')
-        plt.plot(time_axis, ktraj[2].T, label='z')  # Plot the entire k-space trajectory
-        plt.plot(t_adc, ktraj_adc[0], '.', label='adc x')  # Plot sampling points on the kx-axis
-        plt.plot(t_adc, ktraj_adc[1], '.', label='adc y')  # Plot sampling points on the ky-axis
-        plt.legend()
+        lines = plt.plot(time_axis, ktraj.T)  # Plot the entire k-space trajectory (x, y, z)
+        lines += plt.plot(t_adc, ktraj_adc[:2].T, '.')  # Plot sampling points on the kx- and ky-axis
+        plt.legend(lines, ['x', 'y', 'z', 'adc x', 'adc y'])
         if save:
             plt.savefig(f"{folder_plots}{prefix}-trajectory.png")
 
@@ -194,7 +206,10 @@ def main(plot_seq=True, plot_k_space_traj=True, plot_2D_k_space=True, plot_grad=
             seq.write(f"{folder_seq}slice_profile_sequence-{prefix}.seq")
         else:
             seq.write(f"{folder_seq}{seq_filename}-{prefix}.seq")
-            np.savetxt(f"{folder_traj}{prefix}-trajectory.txt", ktraj_adc, delimiter=";", fmt="%g")
+            # Binary float32 keeps more digits than the 6 significant digits of the text export and is much faster.
+            np.save(f"{folder_traj}{prefix}-trajectory.npy", ktraj_adc.astype(np.float32))
+            if traj_txt:
+                np.savetxt(f"{folder_traj}{prefix}-trajectory.txt", ktraj_adc, delimiter=";", fmt="%g")
 
 
 if __name__ == '__main__':
@@ -2,12 +2,13 @@ import math
 from copy import copy
 from types import SimpleNamespace
 from typing import Tuple, Union
+from warnings import warn
 
 import numpy as np
 
 from pypulseq.opts import Opts
 from pypulseq.make_trapezoid import make_trapezoid
-from pypulseq.make_sinc_pulse import make_sinc_pulse
+from pypulseq.supported_labels_rf_use import get_supported_rf_uses
 
 
 def make_half_sinc_pulse(flip_angle: float,
@@ -69,7 +70,7 @@ def make_half_sinc_pulse(flip_angle: float,
            Use of radio-frequency sinc pulse. Must be one of 'excitation', 'refocusing' or 'inversion'.
 
         See also `pypulseq.Sequence.sequence.Sequence.add_block()`.
-        See also `pypulseq.make_sinc_pulse module`.
+        See also `pypulseq.make_sinc_pulse module`, which creates the corresponding full sinc pulse.
 
         Returns
         -------
@@ -86,6 +87,8 @@ def make_half_sinc_pulse(flip_angle: float,
         ------
         ValueError
            If invalid `side` parameter was passed. Must be one of 'left' or 'right'
+           If invalid `use` parameter was passed.
+           If `duration` is not positive.
            If length of the full sinc pulse is uneven.
            If `return_gz=True` and `slice_thickness` was not provided.
         """
@@ -93,27 +96,69 @@ def make_half_sinc_pulse(flip_angle: float,
     if side not in valid_side_uses:
         raise ValueError(f"Invalid side parameter. Must be one of {valid_side_uses}. Passed: {side}")
 
+    if system is None:
+        system = Opts.default
+
+    valid_pulse_uses = get_supported_rf_uses()
+    if use != "" and use not in valid_pulse_uses:
+        raise ValueError(f"Invalid use parameter. Must be one of {valid_pulse_uses}. Passed: {use}")
+
+    if dwell == 0:
+        dwell = system.rf_raster_time
+
+    if duration <= 0:
+        raise ValueError("RF pulse duration must be positive.")
+
     # ======
-    # CREATE FULL SINC
-    # ======
-    # Create the full sinc function as normal
-    rf = make_sinc_pulse(flip_angle=flip_angle, apodization=apodization, delay=delay, duration=duration*2,
-                            dwell=dwell, center_pos=center_pos, freq_offset=freq_offset,
-                            phase_offset=phase_offset, return_gz=False,
-                            system=system, time_bw_product=time_bw_product, use=use)
-    # ======
-    # MODIFY SINC
+    # CREATE HALF SINC
     # ======
-    # Modify the sinc pulse to be a half sinc
-    if len(rf.signal) % 2 != 0:
+    # The half sinc is one half of a full sinc with twice the duration (as created by `make_sinc_pulse`).
+    # Only the samples of the requested half are evaluated.
+    full_duration = duration * 2
+    n_samples = round(full_duration / dwell)
+    if n_samples % 2 != 0:
         raise ValueError("The signal array has an odd number of elements.")
 
-    half_length = int(len(rf.signal) / 2)
-    rf.t = rf.t[:half_length]
-    if side == "left":
-        rf.signal = rf.signal[:half_length]
-    if side == "right":
-        rf.signal = rf.signal[half_length:]
+    half_length = n_samples // 2
+    bandwidth = time_bw_product / full_duration
+
+    def windowed_sinc(first_sample: int) -> np.ndarray:
+        tt = (np.arange(first_sample + 1, first_sample + half_length + 1) - 0.5) * dwell - full_duration * center_pos
+        window = 1 - apodization + apodization * np.cos(2 * np.pi * tt / full_duration)
+        return window * np.sinc(bandwidth * tt)
+
+    first_sample = 0 if side == "left" else half_length
+    signal = windowed_sinc(first_sample)
+
+    # Normalize with the flip angle of the full sinc. With the peak in the middle of a sample grid that spans exactly
+    # the full duration, both halves are mirror images and have the same area.
+    if center_pos == 0.5 and np.isclose(full_duration / dwell, n_samples, rtol=0, atol=1e-9):
+        flip = 2 * np.sum(signal) * dwell * 2 * np.pi
+    else:
+        flip = (np.sum(signal) + np.sum(windowed_sinc(half_length - first_sample))) * dwell * 2 * np.pi
+    signal = signal * flip_angle / flip
+    # Workaround for numpy returning 3.14... for np.angle(-0.00...)
+    signal[signal == -0.0] = 0
+
+    # Single precision is sufficient for the RF shape, the scanner quantizes it anyway.
+    rf = SimpleNamespace()
+    rf.type = "rf"
+    rf.signal = signal.astype(np.float32)
+    rf.t = ((np.arange(1, half_length + 1) - 0.5) * dwell).astype(np.float32)
+    rf.shape_dur = np.float64(half_length * dwell)
+    rf.freq_offset = freq_offset
+    rf.phase_offset = phase_offset
+    rf.dead_time = system.rf_dead_time
+    rf.ringdown_time = system.rf_ringdown_time
+    rf.delay = delay
+
+    if use != "":
+        rf.use = use
+
+    if rf.dead_time > rf.delay:
+        warn(f"Specified RF delay {rf.delay * 1e6:.2f} us is less than the dead time {rf.dead_time * 1e6:.0f} us. "
+             f"Delay was increased to the dead time.", stacklevel=2)
+        rf.delay = rf.dead_time
 
     # ======
     # CREATE SLICE SELECT GRADIENT
@@ -122,13 +167,12 @@ def make_half_sinc_pulse(flip_angle: float,
     if return_gz:
         if slice_thickness == 0:
             raise ValueError('Slice thickness must be provided')
-        if max_grad > 0:
-            system = copy(system)
-            system.max_grad = max_grad
-
-        if max_slew > 0:
+        if max_grad > 0 or max_slew > 0:
             system = copy(system)
-            system.max_slew = max_slew
+            if max_grad > 0:
+                system.max_grad = max_grad
+            if max_slew > 0:
+                system.max_slew = max_slew
 
         area = (time_bw_product/2) / slice_thickness  # only half a pulse, so the tbw is only half as long
 
@@ -144,11 +188,6 @@ def make_half_sinc_pulse(flip_angle: float,
         if rf.delay < (gz.rise_time + gz.delay):
             rf.delay = gz.rise_time + gz.delay
 
-    # correct the shape duration
-    if dwell == 0:
-        dwell = system.rf_raster_time
-    rf.shape_dur = np.float64(half_length * dwell)
-
     # ======
     # RETURN Modified
     # ======
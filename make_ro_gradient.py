@@ -1,5 +1,6 @@
+import numpy as np
 import pypulseq as pp
-from typing import Tuple, Union
+from typing import List, Tuple, Union
 from types import SimpleNamespace
 from pypulseq.convert import convert
 
@@ -56,6 +57,7 @@ def make_basic_gx_gradient_separat(system: Union[pp.Opts, None] = None,
         Spoiler
     prephase : SimpleNamespace, optional
         Prephaser Gradient for read-out. Returned only if `slice_profile` is set to True.
+        The read-out gradient is then delayed by the duration of the prephaser.
     """
 
     gx_amp = convert(from_value=gx_amp, from_unit='mT/m', to_unit='Hz/m')  # Hz/m
@@ -65,12 +67,14 @@ def make_basic_gx_gradient_separat(system: Union[pp.Opts, None] = None,
         channel = 'z'
         gx = pp.make_trapezoid(channel=channel, amplitude=gx_amp, rise_time=gx_rut, flat_time=gx_flat, fall_time=gx_rdt,
                                system=system)
-        prephase = pp.make_trapezoid(channel=channel, area=-gx.area/2, system=system, duration=max(pp.calc_duration(gx)/4, 200e-6))
+        gx_duration = gx_rut + gx_flat + gx_rdt  # gx has no delay yet
+        prephase = pp.make_trapezoid(channel=channel, area=-gx.area/2, system=system, duration=max(gx_duration/4, 200e-6))
         # NotImplementedError: Amplitude + Area input pair is not implemented yet.
+        # The read-out starts right after the prephaser, so `gx.delay` is the duration of the prephaser.
         gx.delay = prephase.rise_time + prephase.flat_time + prephase.fall_time
         spoil = pp.make_trapezoid(channel=channel, amplitude=spoil_amp, rise_time=spoil_rut, flat_time=spoil_flat,
                                   fall_time=spoil_rdt,
-                                  delay=gx_rut + gx_flat+prephase.rise_time+prephase.flat_time+prephase.fall_time, system=system)
+                                  delay=gx_rut + gx_flat + gx.delay, system=system)
         return gx, spoil, prephase
     else:
         channel = 'x'
@@ -81,3 +85,64 @@ def make_basic_gx_gradient_separat(system: Union[pp.Opts, None] = None,
                                   fall_time=spoil_rdt,
                                   delay=gx_rut + gx_flat + delay, system=system)
         return gx, spoil
+
+
+def add_trapezoids(traps: List[SimpleNamespace], system: Union[pp.Opts, None] = None) -> SimpleNamespace:
+    """
+    Adds trapezoids on the same channel to one extended trapezoid (e.g. read-out and spoiler).
+    Same result as `pp.add_gradients` for trapezoids, but the corner points are summed directly, as the corners of
+    trapezoids created by `pp.make_trapezoid` already lie on the gradient raster.
+
+    Parameters
+    --------
+    traps : [SimpleNamespace]
+        Trapezoidal gradient events on the same channel.
+    system : Opts, default=Opts()
+        System limits. Default is a system limits object initialized to default values.
+
+    Returns
+    --------
+    grad : SimpleNamespace
+        Extended trapezoid with the sum of the trapezoids.
+
+    Raises
+    --------
+    ValueError
+        If the trapezoids are not on the same channel.
+        If the sum violates the slew rate or gradient amplitude limits of `system`.
+    """
+    if system is None:
+        system = pp.Opts.default
+    raster = system.grad_raster_time
+
+    channel = traps[0].channel
+    if any(trap.channel != channel for trap in traps):
+        raise ValueError('Cannot add gradients on different channels.')
+
+    # Corner points of all trapezoids in units of the gradient raster
+    corners = [np.round(np.cumsum([trap.delay, trap.rise_time, trap.flat_time, trap.fall_time]) / raster)
+               for trap in traps]
+    steps = np.unique(np.concatenate(corners))
+    waveform = np.zeros(len(steps))
+    for trap, trap_corners in zip(traps, corners):
+        waveform += np.interp(steps, trap_corners, [0, trap.amplitude, trap.amplitude, 0], left=0, right=0)
+
+    grad = SimpleNamespace()
+    grad.type = 'grad'
+    grad.channel = channel
+    grad.waveform = waveform
+    grad.delay = steps[0] * raster
+    grad.tt = (steps - steps[0]) * raster
+    grad.shape_dur = grad.tt[-1]
+    grad.area = 0.5 * ((grad.tt[1:] - grad.tt[:-1]) * (grad.waveform[1:] + grad.waveform[:-1])).sum()
+    grad.first = grad.waveform[0]
+    grad.last = grad.waveform[-1]
+
+    # Overlapping trapezoids can exceed the system limits, even if each of them is valid
+    slew = np.diff(grad.waveform) / np.diff(grad.tt)
+    if max(abs(slew)) > system.max_slew + pp.eps:
+        raise ValueError(f'Slew rate violation {max(abs(slew)) / system.max_slew * 100:.2f}%')
+    if max(abs(grad.waveform)) > system.max_grad + pp.eps:
+        raise ValueError(f'Gradient amplitude violation {max(abs(grad.waveform)) / system.max_grad * 100:.2f}%')
+
+    return grad
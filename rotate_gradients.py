@@ -0,0 +1,82 @@
+from copy import copy
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+
+
+def _shallow_grad(grad: SimpleNamespace, waveform: np.ndarray, scale: float, channel: str) -> SimpleNamespace:
+    # Shallow copy of an arbitrary gradient with an already scaled waveform; the timing (tt, delay, shape_dur) is shared
+    scaled_grad = copy(grad)
+    scaled_grad.channel = channel
+    scaled_grad.waveform = waveform
+    scaled_grad.first = grad.first * scale
+    scaled_grad.last = grad.last * scale
+    if hasattr(grad, 'area'):
+        scaled_grad.area = grad.area * scale
+    if hasattr(scaled_grad, 'id'):
+        delattr(scaled_grad, 'id')
+    return scaled_grad
+
+
+def rotate_gradient_batch(grad: SimpleNamespace,
+                          angles: np.ndarray,
+                          axis: str = 'z'
+                          ) -> List[List[SimpleNamespace]]:
+    """
+    Rotates an arbitrary gradient about the given axis by each of the given angles.
+    The rotated waveforms of all angles are computed at once, so the gradients for e.g. all spokes of a radial
+    sequence can be created before the sequence is constructed.
+
+    Parameters
+    ----------
+    grad : SimpleNamespace
+        Arbitrary gradient (type 'grad'). A gradient parallel to `axis` is not affected.
+    angles : np.ndarray
+        Angles by which the gradient will be rotated.
+    axis : str, default='z'
+        Axis about which the gradient will be rotated. Must be one of 'x', 'y' or 'z'.
+
+    Returns
+    --------
+    rotated_grads : [[SimpleNamespace]]
+        Rotated gradient(s) for each angle. As with `pypulseq.rotate`, a rotation onto a single axis only returns
+        one gradient, otherwise two.
+
+    Raises
+    ------
+    ValueError
+        If invalid `axis` parameter was passed. Must be one of 'x', 'y' or 'z'.
+        If `grad` is not an arbitrary gradient.
+    """
+    axes = ['x', 'y', 'z']
+    if axis not in axes:
+        raise ValueError(f"Invalid axis parameter. Must be one of {axes}. Passed: {axis}")
+    if grad.type != 'grad':
+        raise ValueError(f"Only arbitrary gradients can be rotated. Passed: {grad.type}")
+    axes.remove(axis)
+
+    # Gradients parallel to the rotation axis are not affected
+    if grad.channel == axis:
+        return [[grad] for _ in range(len(angles))]
+
+    # A gradient on the first axis is mapped onto (cos, sin), a gradient on the second axis onto (-sin, cos)
+    if grad.channel == axes[0]:
+        scales1, scales2 = np.cos(angles), np.sin(angles)
+    else:
+        scales1, scales2 = -np.sin(angles), np.cos(angles)
+    # The waveforms of both axes and all angles are allocated as one contiguous block of shape (2, angles, samples)
+    waveforms1, waveforms2 = np.multiply.outer(np.stack((scales1, scales2)), grad.waveform)
+
+    # Eliminate zero-amplitude gradients (same threshold as `pypulseq.rotate`)
+    threshold = 1e-6
+    rotated_grads = []
+    for i in range(len(angles)):
+        g = []
+        if abs(scales1[i]) >= threshold:
+            g.append(_shallow_grad(grad, waveforms1[i], scales1[i], axes[0]))
+        if abs(scales2[i]) >= threshold:
+            g.append(_shallow_grad(grad, waveforms2[i], scales2[i], axes[1]))
+        rotated_grads.append(g)
+
+    return rotated_grads